@@ -6,7 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from src.config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
-from src.messenger.models import Base
+from src.attachments.models import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,51 @@
+import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from src.messenger.models import Base
+
+
+class Attachment(Base):
+    """
+    Класс модели Вложение
+    
+    Поля:
+    id (int): Первичный ключ
+    message_id (int): ID сообщения, к которому прикреплен файл. Сообщение может храниться в шарде, поэтому без внешнего ключа
+    src (str): Относительный путь к файлу
+    filename (str): Исходное имя файла
+    size (int): Размер файла в байтах
+    checksum (str): Контрольная сумма SHA-256 содержимого файла
+    created_at (datetime.дата-время): Дата создания
+    """
+    __tablename__ = 'Attachment'
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    message_id = Column(Integer, nullable=False, index=True)
+    src = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+
+
+class UploadSession(Base):
+    """
+    Класс модели Сессия загрузки. Хранит состояние незавершенной загрузки вложения по частям
+    
+    Поля:
+    id (str): Первичный ключ. Случайный идентификатор сессии
+    owner_id (int): Ссылка на первичный ключ из таблицы Пользователь. Символизирует владельца загрузки
+    filename (str): Исходное имя файла
+    size (int): Ожидаемый размер файла в байтах
+    checksum (str): Ожидаемая контрольная сумма SHA-256 содержимого файла
+    received (int): Количество байт, непрерывно полученных с начала файла
+    created_at (datetime.дата-время): Дата создания
+    expires_at (datetime.дата-время): Дата, после которой незавершенная загрузка удаляется
+    """
+    __tablename__ = 'UploadSession'
+    id = Column(String(32), primary_key=True)
+    owner_id = Column(Integer, ForeignKey('User.id'), nullable=False)
+    filename = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    received = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)
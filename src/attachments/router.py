@@ -0,0 +1,190 @@
+import datetime
+import os
+import uuid
+from contextlib import aclosing
+from fastapi import HTTPException, status, Depends, APIRouter, Request
+from fastapi.responses import FileResponse
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.models import User
+from src.auth.utils import get_current_user
+from src.config import ATTACHMENTS_DIR, UPLOAD_MAX_SIZE
+from src.database import get_async_session, iterate_shard_sessions
+from src.messenger.models import Message
+from .models import Attachment, UploadSession
+from .schemas import UploadSessionCreateSchema, UploadSessionSchema, UploadCompleteSchema, AttachmentSchema
+from .utils import upload_path, upload_expires_at, write_chunk, file_checksum
+
+router = APIRouter(
+    prefix="/attachments",
+    tags=["Attachments"]
+)
+
+
+async def get_upload(upload_id: str, current_user: User, session: AsyncSession) -> UploadSession:
+    """
+    Получение незавершенной и не просроченной сессии загрузки текущего пользователя
+    
+    Атрибуты:
+    upload_id (str): Идентификатор сессии загрузки
+    current_user (User): Текущий пользователь
+    session (AsyncSession): Асинхронная сессия для выполнения запросов к базе данных
+    
+    Исключения:
+    - HTTPException 404 NOT FOUND: Если сессия загрузки не найдена или истекла
+    """
+    upload = await session.execute(select(UploadSession)
+                                   .where(UploadSession.id == upload_id,
+                                          UploadSession.owner_id == current_user.id,
+                                          UploadSession.expires_at > datetime.datetime.now()))
+    upload = upload.scalars().first()
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found or expired",
+        )
+    return upload
+
+
+async def message_exists(session: AsyncSession, message_id: int, *criteria) -> bool:
+    """
+    Проверка существования сообщения. Шард переписки по ID сообщения неизвестен, поэтому опрашиваются все шарды
+    поиском по первичному ключу
+    
+    Атрибуты:
+    session (AsyncSession): Асинхронная сессия основной БД, используется, если шарды не настроены
+    message_id (int): ID сообщения
+    criteria: Дополнительные условия отбора сообщения
+    """
+    async with aclosing(iterate_shard_sessions(session)) as shard_sessions:
+        async for shard_session in shard_sessions:
+            message = await shard_session.execute(select(Message.id).where(Message.id == message_id, *criteria))
+            if message.scalars().first():
+                return True
+    return False
+
+
+@router.post('/uploads/', response_model=UploadSessionSchema)
+async def create_upload(data: UploadSessionCreateSchema,
+                        session: AsyncSession = Depends(get_async_session),
+                        current_user: User = Depends(get_current_user)) -> UploadSession:
+    """
+    URL для открытия сессии загрузки вложения по частям
+    """
+    if data.size > UPLOAD_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File is too large. Maximum size - {UPLOAD_MAX_SIZE} bytes",
+        )
+    
+    upload = UploadSession(id=uuid.uuid4().hex,
+                           owner_id=current_user.id,
+                           received=0,
+                           expires_at=upload_expires_at(),
+                           **data.dict())
+    open(upload_path(upload.id), mode='wb').close()
+    
+    session.add(upload)
+    await session.commit()
+    return upload
+
+
+@router.get('/uploads/{upload_id}/', response_model=UploadSessionSchema)
+async def get_upload_state(upload_id: str,
+                           session: AsyncSession = Depends(get_async_session),
+                           current_user: User = Depends(get_current_user)) -> UploadSession:
+    """
+    URL для получения состояния загрузки. Поле received указывает смещение, с которого следует продолжить загрузку
+    """
+    return await get_upload(upload_id, current_user, session)
+
+
+@router.put('/uploads/{upload_id}/', response_model=UploadSessionSchema)
+async def upload_chunk(upload_id: str,
+                       offset: int,
+                       request: Request,
+                       session: AsyncSession = Depends(get_async_session),
+                       current_user: User = Depends(get_current_user)) -> UploadSession:
+    """
+    URL для отправки части файла. Тело запроса - байты части, offset - смещение части от начала файла.
+    Часть может начинаться не дальше уже полученных данных, повторная отправка части допустима
+    """
+    upload = await get_upload(upload_id, current_user, session)
+    if offset < 0 or offset > upload.received:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Chunk must start at offset not greater than {upload.received}",
+        )
+    # соединение с БД не удерживается, пока принимается тело запроса
+    await session.commit()
+    
+    end = await write_chunk(upload, offset, request.stream())
+    
+    received = await session.execute(update(UploadSession)
+                                     .where(UploadSession.id == upload.id)
+                                     .values(received=func.greatest(UploadSession.received, end),
+                                             expires_at=upload_expires_at())
+                                     .returning(UploadSession.received, UploadSession.expires_at))
+    upload.received, upload.expires_at = received.one()
+    await session.commit()
+    return upload
+
+
+@router.post('/uploads/{upload_id}/complete/', response_model=AttachmentSchema)
+async def complete_upload(upload_id: str,
+                          data: UploadCompleteSchema,
+                          session: AsyncSession = Depends(get_async_session),
+                          current_user: User = Depends(get_current_user)) -> Attachment:
+    """
+    URL для завершения загрузки. Проверяет контрольную сумму файла и прикрепляет его к сообщению текущего пользователя
+    """
+    upload = await get_upload(upload_id, current_user, session)
+    if upload.received != upload.size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is incomplete. Received {upload.received} of {upload.size} bytes",
+        )
+    
+    if not await message_exists(session, data.message_id, Message.sender_id == current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found",
+        )
+    
+    if await file_checksum(upload_path(upload.id)) != upload.checksum:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Checksum mismatch",
+        )
+    
+    attachment_name = f'{upload.id}{os.path.splitext(upload.filename)[1]}'
+    os.replace(upload_path(upload.id), os.path.join(ATTACHMENTS_DIR, attachment_name))
+    
+    attachment = Attachment(message_id=data.message_id,
+                            src=attachment_name,
+                            filename=upload.filename,
+                            size=upload.size,
+                            checksum=upload.checksum)
+    session.add(attachment)
+    await session.execute(delete(UploadSession).where(UploadSession.id == upload.id))
+    await session.commit()
+    return attachment
+
+
+@router.get('/{attachment_id}/')
+async def download_attachment(attachment_id: int,
+                              session: AsyncSession = Depends(get_async_session),
+                              current_user: User = Depends(get_current_user)) -> FileResponse:
+    """
+    URL для скачивания вложения. Доступно отправителю и получателю сообщения
+    """
+    attachment = await session.execute(select(Attachment).where(Attachment.id == attachment_id))
+    attachment: Attachment = attachment.scalars().first()
+    if not attachment or not await message_exists(session, attachment.message_id,
+                                                  or_(Message.sender_id == current_user.id,
+                                                      Message.recipient_id == current_user.id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found",
+        )
+    return FileResponse(os.path.join(ATTACHMENTS_DIR, attachment.src), filename=attachment.filename)
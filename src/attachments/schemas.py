@@ -0,0 +1,63 @@
+import datetime
+from pydantic import BaseModel, ConfigDict, constr, conint
+
+
+class UploadSessionCreateSchema(BaseModel):
+    """
+    Схема открытия сессии загрузки вложения
+    
+    Атрибуты:
+    filename (str): Имя файла
+    size (int): Размер файла в байтах
+    checksum (str): Контрольная сумма SHA-256 содержимого файла в шестнадцатеричном виде
+    """
+    filename: constr(strip_whitespace=True, min_length=1, max_length=255)
+    size: conint(gt=0)
+    checksum: constr(to_lower=True, pattern=r'^[0-9a-fA-F]{64}$')
+
+
+class UploadSessionSchema(UploadSessionCreateSchema):
+    """
+    Схема модели Сессия загрузки. Наследуется от схемы UploadSessionCreateSchema, дополняясь полями id, received и
+    expires_at
+    
+    Атрибуты:
+    id (str): Идентификатор сессии загрузки
+    received (int): Количество байт, непрерывно полученных с начала файла. С этого смещения следует продолжать загрузку
+    expires_at (datetime): Дата, после которой незавершенная загрузка удаляется
+    """
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: str
+    received: int
+    expires_at: datetime.datetime
+
+
+class UploadCompleteSchema(BaseModel):
+    """
+    Схема завершения загрузки вложения
+    
+    Атрибуты:
+    message_id (int): ID сообщения, к которому прикрепляется файл
+    """
+    message_id: int
+
+
+class AttachmentSchema(BaseModel):
+    """
+    Схема модели Вложение
+    
+    Атрибуты:
+    id (int): Первичный ключ
+    message_id (int): ID сообщения, к которому прикреплен файл
+    filename (str): Исходное имя файла
+    size (int): Размер файла в байтах
+    checksum (str): Контрольная сумма SHA-256 содержимого файла
+    """
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    message_id: int
+    filename: str
+    size: int
+    checksum: str
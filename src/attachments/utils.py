@@ -0,0 +1,110 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+from typing import AsyncIterator
+import aiofiles
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from src.config import UPLOADS_DIR, UPLOAD_SESSION_EXPIRE_MINUTES
+from src.database import async_session
+from .models import UploadSession
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+UPLOADS_CLEANUP_INTERVAL_SECONDS = 10 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def upload_path(upload_id: str) -> str:
+    """
+    Путь к файлу незавершенной загрузки
+    
+    Атрибуты:
+    upload_id (str): Идентификатор сессии загрузки
+    """
+    return os.path.join(UPLOADS_DIR, f'{upload_id}.part')
+
+
+def upload_expires_at() -> datetime.datetime:
+    """
+    Дата истечения сессии загрузки. Продлевается при каждой полученной части файла
+    """
+    return datetime.datetime.now() + datetime.timedelta(minutes=UPLOAD_SESSION_EXPIRE_MINUTES)
+
+
+async def write_chunk(upload: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Асинхронная функция записи части файла по смещению. Данные пишутся на диск по мере получения, не накапливаясь в
+    памяти. Повторная отправка той же части перезаписывает те же байты, поэтому безопасна
+    
+    Атрибуты:
+    upload (UploadSession): Сессия загрузки
+    offset (int): Смещение от начала файла, с которого записывается часть
+    chunks (AsyncIterator[bytes]): Поток байт тела запроса
+    
+    Возвращается:
+    - Смещение конца записанной части
+    
+    Исключения:
+    - HTTPException 400 BAD REQUEST: Если часть выходит за пределы заявленного размера файла
+    """
+    end = offset
+    async with aiofiles.open(upload_path(upload.id), mode='r+b') as f:
+        await f.seek(offset)
+        async for chunk in chunks:
+            end += len(chunk)
+            if end > upload.size:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Chunk exceeds declared file size",
+                )
+            await f.write(chunk)
+    return end
+
+
+async def file_checksum(path: str) -> str:
+    """
+    Асинхронная функция подсчета контрольной суммы SHA-256 файла. Файл читается частями по CHECKSUM_CHUNK_SIZE байт
+    
+    Атрибуты:
+    path (str): Путь к файлу
+    """
+    sha256 = hashlib.sha256()
+    async with aiofiles.open(path, mode='rb') as f:
+        while chunk := await f.read(CHECKSUM_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def remove_expired_uploads() -> int:
+    """
+    Удаляет просроченные сессии загрузки вместе с их незавершенными файлами
+    
+    Возвращается:
+    - Количество удаленных сессий
+    """
+    async with async_session() as session:
+        expired = await session.execute(delete(UploadSession)
+                                        .where(UploadSession.expires_at < datetime.datetime.now())
+                                        .returning(UploadSession.id))
+        expired = expired.scalars().all()
+        await session.commit()
+    
+    for upload_id in expired:
+        if os.path.exists(upload_path(upload_id)):
+            os.remove(upload_path(upload_id))
+    return len(expired)
+
+
+async def run_uploads_cleanup():
+    """
+    Фоновая задача, периодически удаляющая брошенные загрузки
+    """
+    while True:
+        try:
+            await remove_expired_uploads()
+        except Exception:
+            logger.exception('Failed to remove expired uploads')
+        await asyncio.sleep(UPLOADS_CLEANUP_INTERVAL_SECONDS)
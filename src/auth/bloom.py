@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import math
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import USERNAME_FILTER_ERROR_RATE, USERNAME_FILTER_REBUILD_MINUTES
+from src.database import async_session
+from .models import User
+
+BUILD_BATCH_SIZE = 10000
+MIN_CAPACITY = 100000
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Фильтр Блума - компактное вероятностное множество строк. Проверка вхождения может ошибочно ответить "есть"
+    с вероятностью error_rate, но никогда не ошибается с ответом "нет"
+    
+    Атрибуты:
+    size (int): Количество бит
+    hashes (int): Количество хэш-функций
+    bits (bytearray): Битовый массив
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def positions(self, item: str):
+        """
+        Номера бит элемента. Хэш-функции получаются двойным хэшированием одного дайджеста blake2b
+        
+        Атрибуты:
+        item (str): Элемент
+        """
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+    
+    def add(self, item: str):
+        """
+        Добавляет элемент в фильтр
+        
+        Атрибуты:
+        item (str): Элемент
+        """
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class UsernameRegistry:
+    """
+    Реестр занятых никнеймов на основе фильтра Блума. Строится при запуске приложения чтением таблицы User и
+    периодически перестраивается, чтобы освободить никнеймы, ставшие свободными после переименования.
+    
+    Фильтр хранится в памяти процесса, поэтому пользователи, созданные другими процессами (другим воркером или
+    массовым импортом), ему изначально неизвестны. Чтобы не считать их никнеймы свободными, перед отрицательным ответом
+    максимальный User.id сравнивается с отметкой watermark, и новые пользователи дочитываются в фильтр. Переименования
+    в других процессах учитываются только при перестроении, поэтому занятость такого никнейма подтверждается
+    ошибкой IntegrityError при сохранении
+    
+    Атрибуты:
+    filter (BloomFilter | None): Текущий фильтр. None, пока фильтр не построен
+    building (BloomFilter | None): Фильтр, который строится в данный момент
+    watermark (int): Максимальный ID пользователя, чей никнейм уже добавлен в фильтр
+    """
+    
+    def __init__(self):
+        self.filter: BloomFilter | None = None
+        self.building: BloomFilter | None = None
+        self.watermark = 0
+    
+    async def build(self):
+        """
+        Строит новый фильтр, читая никнеймы из БД серверным курсором, и заменяет им текущий
+        """
+        async with async_session() as session:
+            count = await session.scalar(select(func.count()).select_from(User))
+            self.building = BloomFilter(max(count * 2, MIN_CAPACITY), USERNAME_FILTER_ERROR_RATE)
+            try:
+                # пользователи, созданные во время чтения, попадут в фильтр через catch_up
+                watermark = await session.scalar(select(func.max(User.id))) or 0
+                result = await session.stream(select(User.username)
+                                              .where(User.username.is_not(None), User.id <= watermark)
+                                              .execution_options(yield_per=BUILD_BATCH_SIZE))
+                async for username in result.scalars():
+                    self.building.add(username)
+                self.filter = self.building
+                self.watermark = max(self.watermark, watermark)
+            finally:
+                self.building = None
+    
+    def add(self, username: str):
+        """
+        Отмечает никнейм как занятый
+        
+        Атрибуты:
+        username (str): Никнейм
+        """
+        for bloom in (self.filter, self.building):
+            if bloom is not None:
+                bloom.add(username)
+    
+    async def catch_up(self, session: AsyncSession):
+        """
+        Добавляет в фильтр никнеймы пользователей, созданных после отметки watermark. Обычно это один запрос
+        максимума по первичному ключу
+        
+        Атрибуты:
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к базе данных
+        """
+        latest = await session.scalar(select(func.max(User.id)))
+        if not latest or latest <= self.watermark:
+            return
+        new_usernames = await session.execute(select(User.username)
+                                              .where(User.id > self.watermark, User.id <= latest,
+                                                     User.username.is_not(None)))
+        for username in new_usernames.scalars():
+            self.add(username)
+        self.watermark = max(self.watermark, latest)
+    
+    async def is_taken(self, username: str, session: AsyncSession) -> bool:
+        """
+        Проверяет, занят ли никнейм
+        
+        Атрибуты:
+        username (str): Никнейм
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к базе данных
+        """
+        if self.filter is not None and username not in self.filter:
+            await self.catch_up(session)
+            if username not in self.filter:
+                return False
+        user = await session.execute(select(User.id).where(User.username == username))
+        return user.scalars().first() is not None
+
+
+usernames = UsernameRegistry()
+
+
+async def run_usernames_rebuild():
+    """
+    Фоновая задача, строящая фильтр никнеймов при запуске и периодически перестраивающая его
+    """
+    while True:
+        try:
+            await usernames.build()
+        except Exception:
+            logger.exception('Failed to build usernames filter')
+        await asyncio.sleep(USERNAME_FILTER_REBUILD_MINUTES * 60)
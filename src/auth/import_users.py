@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import asyncpg
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from src.database import engine
+from .models import User, pwd_context
+from .schemas import UserCreate
+
+MAX_CHUNK_SIZE = 100000
+
+COPY_COLUMNS = ['username', 'password_hash', 'first_name', 'last_name', 'phone', 'sex', 'email']
+
+
+def hash_password(password: str) -> str:
+    """
+    Хэширует пароль. Вынесено в функцию уровня модуля, чтобы её можно было передать в пул процессов
+
+    Атрибуты:
+    password (str): Пароль пользователя
+    """
+    return pwd_context.hash(password)
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, Dict | None, str | None]]:
+    """
+    Построчно читает файл с пользователями в формате CSV или NDJSON, не загружая его в память целиком.
+    Формат определяется по расширению файла (.csv - CSV, остальные - NDJSON)
+
+    Атрибуты:
+    path (str): Путь к файлу
+
+    Возвращается:
+    - Кортежи (номер строки, словарь с данными или None, текст ошибки или None)
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                if None in row:
+                    # DictReader складывает значения сверх заголовка под ключ None
+                    yield reader.line_num, None, 'Row has more fields than the header'
+                    continue
+                yield reader.line_num, {k: v for k, v in row.items() if v not in (None, '')}, None
+            return
+
+        for line_num, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_num, None, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(row, dict):
+                yield line_num, None, 'Row must be a JSON object'
+                continue
+            yield line_num, row, None
+
+
+def validate_row(row: Dict) -> UserCreate:
+    """
+    Проверяет строку по правилам схемы UserCreate и ограничениям длины столбцов таблицы User, приводя ошибки
+    валидации номера телефона к ValueError
+
+    Атрибуты:
+    row (Dict): Данные пользователя
+    """
+    try:
+        user = UserCreate(**row)
+    except HTTPException as exc:
+        raise ValueError(exc.detail)
+
+    for name in COPY_COLUMNS:
+        length = getattr(User.__table__.c[name].type, 'length', None)
+        value = getattr(user, name, None)
+        if length and isinstance(value, str) and len(value) > length:
+            raise ValueError(f'{name} is longer than {length} characters')
+    return user
+
+
+async def copy_records(conn: asyncpg.Connection, records: List[Tuple[int, Tuple]]) -> Tuple[int, List[str]]:
+    """
+    Загружает записи в таблицу User через COPY. Если команда не выполнилась, пачка делится пополам и загружается
+    по частям, пока ошибка не будет сведена к отдельной строке, - так отбрасываются только ошибочные строки
+
+    Атрибуты:
+    conn (asyncpg.Connection): Соединение с БД
+    records (List[Tuple[int, Tuple]]): Пары (номер строки, значения столбцов COPY_COLUMNS)
+
+    Возвращается:
+    - Количество загруженных пользователей и список ошибок
+    """
+    try:
+        async with conn.transaction():
+            await conn.copy_records_to_table(User.__tablename__,
+                                             records=[record for _, record in records],
+                                             columns=COPY_COLUMNS)
+        return len(records), []
+    except asyncpg.PostgresError as exc:
+        if len(records) == 1:
+            return 0, [f'line {records[0][0]}: {exc}']
+
+    middle = len(records) // 2
+    loaded, errors = await copy_records(conn, records[:middle])
+    loaded_right, errors_right = await copy_records(conn, records[middle:])
+    return loaded + loaded_right, errors + errors_right
+
+
+async def copy_chunk(chunk: List[Tuple[int, UserCreate]], pool: ProcessPoolExecutor) -> Tuple[int, List[str]]:
+    """
+    Загружает пачку пользователей в таблицу User через COPY.
+    Пользователи с уже занятым никнеймом отбрасываются до хэширования паролей
+
+    Атрибуты:
+    chunk (List[Tuple[int, UserCreate]]): Пары (номер строки, проверенные данные пользователя)
+    pool (ProcessPoolExecutor): Пул процессов для хэширования паролей
+
+    Возвращается:
+    - Количество загруженных пользователей и список ошибок
+    """
+    errors = []
+    async with engine.connect() as conn:
+        # никнеймы передаются одним параметром-массивом, поэтому размер пачки не ограничен лимитом параметров запроса
+        names = bindparam('names', [user.username for _, user in chunk], type_=ARRAY(String))
+        taken = await conn.execute(select(User.username).where(User.username == any_(names)))
+        taken = set(taken.scalars().all())
+        await conn.rollback()
+
+        users = []
+        for line_num, user in chunk:
+            if user.username in taken:
+                errors.append(f'line {line_num}: username {user.username!r} already exists')
+                continue
+            taken.add(user.username)
+            users.append((line_num, user))
+        if not users:
+            return 0, errors
+
+        loop = asyncio.get_running_loop()
+        hashes = await asyncio.gather(*(loop.run_in_executor(pool, hash_password, user.password)
+                                        for _, user in users))
+        records = [
+            (line_num, (user.username, password_hash, user.first_name, user.last_name, user.phone, user.sex.value,
+                        user.email))
+            for (line_num, user), password_hash in zip(users, hashes)
+        ]
+
+        raw = await conn.get_raw_connection()
+        loaded, copy_errors = await copy_records(raw.driver_connection, records)
+
+    return loaded, errors + copy_errors
+
+
+async def import_users(path: str, chunk_size: int, workers: int | None) -> int:
+    """
+    Импортирует пользователей из файла пачками. Ошибки отдельных строк выводятся в stderr и не прерывают импорт
+
+    Атрибуты:
+    path (str): Путь к файлу в формате CSV или NDJSON
+    chunk_size (int): Количество пользователей, загружаемых одной командой COPY
+    workers (int | None): Количество процессов для хэширования паролей. По умолчанию - число ядер
+
+    Возвращается:
+    - Количество строк с ошибками
+    """
+    imported = failed = 0
+
+    async def flush(chunk: List[Tuple[int, UserCreate]]):
+        nonlocal imported, failed
+        loaded, errors = await copy_chunk(chunk, pool)
+        imported += loaded
+        failed += len(chunk) - loaded
+        for error in errors:
+            print(error, file=sys.stderr)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunk, seen = [], set()
+        for line_num, row, error in read_rows(path):
+            if row is not None:
+                try:
+                    user = validate_row(row)
+                except (ValidationError, ValueError, TypeError) as exc:
+                    error = str(exc)
+                else:
+                    if user.username in seen:
+                        error = f'username {user.username!r} is duplicated in the file'
+                    else:
+                        seen.add(user.username)
+            if error:
+                failed += 1
+                print(f'line {line_num}: {error}', file=sys.stderr)
+                continue
+
+            chunk.append((line_num, user))
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+
+    await engine.dispose()
+    print(f'Imported: {imported}, failed: {failed}')
+    return failed
+
+
+def main():
+    """
+    Точка входа консольной команды массового импорта пользователей:
+
+    python -m src.auth.import_users users.csv --chunk-size 5000 --workers 8
+    """
+    parser = argparse.ArgumentParser(description='Bulk import of users from CSV or NDJSON file')
+    parser.add_argument('path', help='CSV (.csv) or NDJSON file with users')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Users per COPY command')
+    parser.add_argument('--workers', type=int, default=None, help='Processes for password hashing')
+    args = parser.parse_args()
+    if not 1 <= args.chunk_size <= MAX_CHUNK_SIZE:
+        parser.error(f'--chunk-size must be between 1 and {MAX_CHUNK_SIZE}')
+
+    failed = asyncio.run(import_users(args.path, args.chunk_size, args.workers))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
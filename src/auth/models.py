@@ -55,6 +55,7 @@ class User(Base):
     sex (SexEnum): Пол. Предполагается только 2 варианта
     avatar_id (int): Ссылка на первичный ключ из таблицы Аватар
     email (str): Электронная почта
+    last_seen (datetime.дата-время): Время последней активности
     """
     __tablename__ = 'User'
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -66,6 +67,7 @@ class User(Base):
     sex = Column(Enum(SexEnum))
     avatar_id = Column(Integer, ForeignKey('Avatar.id'))
     email = Column(String, nullable=False)
+    last_seen = Column(DateTime)
     
     avatar: Mapped["Avatar"] = relationship('Avatar', back_populates='user', lazy='joined', uselist=False)
     
@@ -4,11 +4,14 @@ from typing import Annotated, Dict
 from fastapi import HTTPException, status, Depends, APIRouter, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import update, select, delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.bloom import usernames
 from src.auth.utils import authenticate_user, create_access_token
 from src.database import get_async_session
+from src.messenger.cache import search_cache
 from .models import User, Avatar
-from .schemas import Token, UserCreate, UserSchema, UserChange
+from .schemas import Token, UserCreate, UserSchema, UserChange, UsernameAvailabilitySchema
 from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, AVATARS_DIR
 from .utils import write_to_disk, get_current_user, verify_password
 
@@ -41,6 +44,24 @@ async def login_for_access_token(
             "token_type": "bearer"}
 
 
+username_taken_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Username already exists",
+)
+
+
+@router.get("/username-available/", response_model=UsernameAvailabilitySchema)
+async def check_username(
+        username: str,
+        session: AsyncSession = Depends(get_async_session)
+) -> Dict:
+    """
+    URL для проверки, свободен ли никнейм
+    """
+    return {"username": username,
+            "available": not await usernames.is_taken(username, session)}
+
+
 @router.post("/sign-up/", response_model=UserSchema)
 async def create_user(
         new_user: UserCreate.form_body() = Depends(),
@@ -56,6 +77,9 @@ async def create_user(
             detail="Incorrect file format. Acceptable - jpg, jpeg, png",
         )
     
+    if await usernames.is_taken(new_user.username, session):
+        raise username_taken_exception
+    
     data = new_user.dict()
     password = data.pop('password')
     us: User = User(**data)
@@ -68,7 +92,14 @@ async def create_user(
     
     session.add(us)
     
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        # никнейм занят пользователем, о котором фильтр еще не знает
+        usernames.add(us.username)
+        raise
+    usernames.add(us.username)
+    search_cache.invalidate()
     return us
 
 
@@ -90,6 +121,10 @@ async def change_account(
             detail="Incorrect password",
         )
     
+    if data.get('username', current_user.username) != current_user.username \
+            and await usernames.is_taken(data['username'], session):
+        raise username_taken_exception
+    
     u: User = await session.execute(select(User).where(User.id == current_user.id))
     u = u.scalars().first()
     last_avatar = u.avatar
@@ -107,8 +142,16 @@ async def change_account(
         await session.execute(delete(Avatar).where(Avatar.src == last_avatar.src))
 
     session.add(u)
-    if data:
-        await session.execute(update(User).values(**data).where(User.id == current_user.id))
-    await session.commit()
+    try:
+        if data:
+            await session.execute(update(User).values(**data).where(User.id == current_user.id))
+        await session.commit()
+    except IntegrityError:
+        if data.get('username'):
+            usernames.add(data['username'])
+        raise
+    if data.get('username'):
+        usernames.add(data['username'])
+    search_cache.invalidate()
     
     return u
@@ -1,3 +1,4 @@
+import datetime
 from typing import Optional
 from fastapi import HTTPException, Form
 from phonenumbers import is_possible_number, parse
@@ -61,16 +62,20 @@ class BaseUserSchema(BaseModel):
 
 class UserSchema(BaseUserSchema):
     """
-    Основная схема модели Пользователь. Наследуется от базовой схемы, дополняясь полями id и avatar
+    Основная схема модели Пользователь. Наследуется от базовой схемы, дополняясь полями id, avatar, online и last_seen
     
     Атрибуты:
     id (int): Первичный ключ
     avatar: Отношение один-к-одному, позволяющее обращаться к модели Автара посредством python-объектов
+    online (bool): Находится ли пользователь в сети
+    last_seen (datetime): Время последней активности
     """
     model_config = ConfigDict(from_attributes=True)
     
     id: int
     avatar: Optional[AvatarSchema]
+    online: bool = False
+    last_seen: Optional[datetime.datetime] = None
 
 
 class Token(BaseModel):
@@ -95,6 +100,18 @@ class UserInDB(UserSchema):
     password_hash: str
 
 
+class UsernameAvailabilitySchema(BaseModel):
+    """
+    Схема проверки доступности никнейма.
+    
+    Атрибуты:
+    username (str): Проверяемый никнейм
+    available (bool): Свободен ли никнейм
+    """
+    username: str
+    available: bool
+
+
 class TokenData(BaseModel):
     """
     Схема Токена.
@@ -10,6 +10,8 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 
+MESSAGE_SHARD_URLS = [url.strip() for url in os.getenv("MESSAGE_SHARD_URLS", "").split(",") if url.strip()]
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
@@ -19,9 +21,39 @@ dir_path = dir_path.absolute()
 
 MEDIA_ROOT = os.path.join(dir_path, 'media')
 AVATARS_DIR = os.path.join(MEDIA_ROOT, 'avatars')
+ATTACHMENTS_DIR = os.path.join(MEDIA_ROOT, 'attachments')
+UPLOADS_DIR = os.path.join(MEDIA_ROOT, 'uploads')
+
+UPLOAD_SESSION_EXPIRE_MINUTES = int(os.getenv("UPLOAD_SESSION_EXPIRE_MINUTES") or 60 * 24)
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE") or 1024 ** 3)
+
+PRESENCE_TTL_SECONDS = int(os.getenv("PRESENCE_TTL_SECONDS") or 60)
+PRESENCE_FLUSH_INTERVAL_SECONDS = int(os.getenv("PRESENCE_FLUSH_INTERVAL_SECONDS") or 30)
+
+READ_MARKERS_FLUSH_INTERVAL_SECONDS = int(os.getenv("READ_MARKERS_FLUSH_INTERVAL_SECONDS") or 5)
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS") or 30)
+SEARCH_CACHE_MAX_SIZE = int(os.getenv("SEARCH_CACHE_MAX_SIZE") or 10000)
+
+USERNAME_FILTER_ERROR_RATE = float(os.getenv("USERNAME_FILTER_ERROR_RATE") or 0.01)
+USERNAME_FILTER_REBUILD_MINUTES = int(os.getenv("USERNAME_FILTER_REBUILD_MINUTES") or 60)
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE") or 1)
+PROFILES_MAX_FILES = int(os.getenv("PROFILES_MAX_FILES") or 100)
+PROFILES_DIR = os.path.join(dir_path, 'profiles')
 
 if not os.path.exists(MEDIA_ROOT):
     os.makedirs(MEDIA_ROOT)
 
 if not os.path.exists(AVATARS_DIR):
     os.makedirs(AVATARS_DIR)
+
+if not os.path.exists(ATTACHMENTS_DIR):
+    os.makedirs(ATTACHMENTS_DIR)
+
+if not os.path.exists(UPLOADS_DIR):
+    os.makedirs(UPLOADS_DIR)
+
+if PROFILING_TOKEN and not os.path.exists(PROFILES_DIR):
+    os.makedirs(PROFILES_DIR)
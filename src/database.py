@@ -1,8 +1,11 @@
-from typing import AsyncGenerator
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+from sqlalchemy import Sequence, select
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
-from src.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from src.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, MESSAGE_SHARD_URLS
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 Base = declarative_base()
@@ -11,6 +14,15 @@ Base = declarative_base()
 engine = create_async_engine(DATABASE_URL)
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# Базы данных, в которых хранятся сообщения. Без настроенных шардов сообщения хранятся в основной БД
+SHARDED = bool(MESSAGE_SHARD_URLS)
+shard_engines = [create_async_engine(url) for url in MESSAGE_SHARD_URLS] if SHARDED else [engine]
+shard_sessions = [sessionmaker(shard_engine, expire_on_commit=False, class_=AsyncSession)
+                  for shard_engine in shard_engines]
+
+message_id_seq = Sequence('Message_id_seq')
+
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Функция асинхронного генератора, которая возвращает асинхронный контекстный менеджер для сеанса для работы с
@@ -20,4 +32,66 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     - Асинхронный генератор, который выдает объект асинхронного сеанса БД
     """
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def shard_for(user_id: int, peer_id: int, shards_count: int | None = None) -> int:
+    """
+    Номер шарда переписки двух пользователей. Переписка определяется неупорядоченной парой ID, шард выбирается
+    рандеву-хэшированием: при добавлении шарда в конец списка переезжает только часть переписок, попадающих в него
+
+    Атрибуты:
+    user_id (int): ID одного участника переписки
+    peer_id (int): ID другого участника переписки
+    shards_count (int | None): Количество шардов. По умолчанию - количество настроенных шардов
+    """
+    key = f'{min(user_id, peer_id)}:{max(user_id, peer_id)}'
+    return max(range(shards_count or len(shard_engines)),
+               key=lambda shard: hashlib.blake2b(f'{shard}:{key}'.encode(), digest_size=8).digest())
+
+
+@asynccontextmanager
+async def get_shard_session(user_id: int, peer_id: int,
+                            session: AsyncSession | None = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Асинхронный контекстный менеджер сеанса БД шарда, в котором хранится переписка двух пользователей.
+    Без шардов сообщения хранятся в основной БД, поэтому переданный сеанс основной БД используется повторно, чтобы
+    не занимать второе соединение
+
+    Атрибуты:
+    user_id (int): ID одного участника переписки
+    peer_id (int): ID другого участника переписки
+    session (AsyncSession | None): Уже открытый сеанс основной БД
+    """
+    if session is not None and not SHARDED:
+        yield session
+        return
+    async with shard_sessions[shard_for(user_id, peer_id)]() as shard_session:
+        yield shard_session
+
+
+async def iterate_shard_sessions(session: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    Асинхронный генератор сеансов всех шардов сообщений. Без шардов выдает переданный сеанс основной БД, если он есть
+
+    Атрибуты:
+    session (AsyncSession | None): Уже открытый сеанс основной БД
+    """
+    if session is not None and not SHARDED:
+        yield session
+        return
+    for shard_session in shard_sessions:
+        async with shard_session() as opened_session:
+            yield opened_session
+
+
+async def next_message_id(session: AsyncSession) -> int | None:
+    """
+    Выделяет ID нового сообщения из последовательности основной БД, чтобы ID оставались уникальными во всех шардах
+    и не менялись при переносе переписки между шардами. Без шардов ID назначает сама таблица
+
+    Атрибуты:
+    session (AsyncSession): Асинхронная сессия основной БД
+    """
+    if SHARDED:
+        return await session.scalar(select(message_id_seq.next_value()))
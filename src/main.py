@@ -1,13 +1,50 @@
+import asyncio
 import pydantic_core
 from fastapi import FastAPI, Request, status
 from sqlalchemy.exc import IntegrityError
 from starlette.responses import JSONResponse
+from src.attachments.router import router as attachments_router
+from src.attachments.utils import run_uploads_cleanup
+from src.auth.bloom import run_usernames_rebuild
 from src.auth.router import router as auth_router
+from src.config import PROFILING_TOKEN
+from src.messenger.presence import run_presence_flush
+from src.messenger.read_markers import run_read_markers_flush
 from src.messenger.router import router as mess_router
+from src.profiling import ProfilingMiddleware
 
 app = FastAPI(title='workin_messenger')
 app.include_router(mess_router)
 app.include_router(auth_router)
+app.include_router(attachments_router)
+
+if PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+background_tasks = set()
+
+
+@app.on_event('startup')
+async def start_background_tasks():
+    """
+    Запускает фоновые задачи приложения
+    """
+    for job in (run_uploads_cleanup, run_presence_flush, run_read_markers_flush, run_usernames_rebuild):
+        task = asyncio.create_task(job())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+@app.on_event('shutdown')
+async def stop_background_tasks():
+    """
+    Останавливает фоновые задачи приложения и дожидается их завершения, чтобы накопленные в памяти данные
+    успели сохраниться в БД
+    """
+    tasks = list(background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 
 @app.exception_handler(IntegrityError)
@@ -0,0 +1,68 @@
+import time
+from typing import Dict, List, Tuple
+from src.auth.schemas import UserSchema
+from src.config import SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_SIZE
+
+
+class SearchCache:
+    """
+    Кэш результатов поиска пользователей по никнейму с коротким временем жизни. Поиск не зависит от регистра, поэтому
+    ключом служит запрос в нижнем регистре. Кэш очищается целиком при регистрации пользователя и изменении аккаунта
+    
+    Атрибуты:
+    entries (Dict[str, Tuple[float, List[UserSchema]]]): Запрос - (время истечения, найденные пользователи)
+    """
+    
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, List[UserSchema]]] = {}
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Приводит поисковый запрос к ключу кэша
+        
+        Атрибуты:
+        query (str): Поисковый запрос
+        """
+        return query.lower()
+    
+    def get(self, query: str) -> List[UserSchema] | None:
+        """
+        Получение результата поиска из кэша
+        
+        Атрибуты:
+        query (str): Нормализованный поисковый запрос
+        
+        Возвращается:
+        - Найденные пользователи или None, если результата нет в кэше или он устарел
+        """
+        entry = self.entries.get(query)
+        if entry is None:
+            return None
+        expires_at, users = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(query, None)
+            return None
+        return users
+    
+    def set(self, query: str, users: List[UserSchema]):
+        """
+        Сохранение результата поиска в кэш. При переполнении вытесняется самая старая запись
+        
+        Атрибуты:
+        query (str): Нормализованный поисковый запрос
+        users (List[UserSchema]): Найденные пользователи
+        """
+        self.entries.pop(query, None)
+        if len(self.entries) >= SEARCH_CACHE_MAX_SIZE:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[query] = (time.monotonic() + SEARCH_CACHE_TTL_SECONDS, users)
+    
+    def invalidate(self):
+        """
+        Очищает кэш. Вызывается при любом изменении данных пользователей
+        """
+        self.entries.clear()
+
+
+search_cache = SearchCache()
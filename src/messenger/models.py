@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
+from sqlalchemy import Column, Integer, ForeignKey, Text, Index
 from src.auth.models import Base
 
 
@@ -13,7 +13,27 @@ class Message(Base):
     content (str): Текст сообщения
     """
     __tablename__ = 'Message'
+    __table_args__ = (
+        # покрывающий индекс для подсчета непрочитанных сообщений сканированием только индекса
+        Index('ix_Message_recipient_id_sender_id_id', 'recipient_id', 'sender_id', 'id'),
+    )
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     sender_id = Column(Integer, ForeignKey('User.id'), nullable=False)
     recipient_id = Column(Integer, ForeignKey('User.id'), nullable=False)
     content = Column(Text, nullable=False)
+
+
+class ReadMarker(Base):
+    """
+    Класс модели Отметка о прочтении. Хранит для пользователя и собеседника ID последнего прочитанного сообщения,
+    все сообщения собеседника с меньшим или равным ID считаются прочитанными
+    
+    Поля:
+    user_id (int): Ссылка на первичный ключ из таблицы Пользователь. Символизирует читателя
+    peer_id (int): Ссылка на первичный ключ из таблицы Пользователь. Символизирует собеседника
+    last_read_message_id (int): ID последнего прочитанного сообщения
+    """
+    __tablename__ = 'ReadMarker'
+    user_id = Column(Integer, ForeignKey('User.id'), primary_key=True)
+    peer_id = Column(Integer, ForeignKey('User.id'), primary_key=True)
+    last_read_message_id = Column(Integer, nullable=False)
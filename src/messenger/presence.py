@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import Dict, Iterable, List
+from sqlalchemy import update
+from src.auth.models import User
+from src.auth.schemas import UserSchema
+from src.config import PRESENCE_TTL_SECONDS, PRESENCE_FLUSH_INTERVAL_SECONDS
+from src.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceRegistry:
+    """
+    Реестр присутствия пользователей в сети. Хранит в памяти процесса время последнего сигнала активности каждого
+    пользователя (целое число секунд эпохи) и периодически пачкой сохраняет его в поле User.last_seen.
+    Записи старше PRESENCE_TTL_SECONDS после сохранения удаляются из памяти - их время уже есть в БД
+    
+    Атрибуты:
+    last_seen (Dict[int, int]): ID пользователя - время последнего сигнала активности
+    dirty (set): ID пользователей, чье время еще не сохранено в БД
+    """
+    
+    def __init__(self):
+        self.last_seen: Dict[int, int] = {}
+        self.dirty = set()
+    
+    def heartbeat(self, user_id: int):
+        """
+        Отмечает пользователя как находящегося в сети
+        
+        Атрибуты:
+        user_id (int): ID пользователя
+        """
+        self.last_seen[user_id] = int(time.time())
+        self.dirty.add(user_id)
+    
+    def lookup(self, user_ids: Iterable[int]) -> Dict[int, datetime.datetime]:
+        """
+        Пакетное получение времени последней активности из памяти без обращения к БД
+        
+        Атрибуты:
+        user_ids (Iterable[int]): ID пользователей
+        
+        Возвращается:
+        - Словарь ID пользователя - время последней активности. Пользователи без записи в памяти отсутствуют
+        """
+        return {user_id: datetime.datetime.fromtimestamp(self.last_seen[user_id])
+                for user_id in user_ids if user_id in self.last_seen}
+    
+    def annotate(self, users: List[UserSchema]) -> List[UserSchema]:
+        """
+        Дополняет пользователей статусом "в сети" и временем последней активности. Время берется из памяти, а при его
+        отсутствии - из уже загруженного поля last_seen. Исходные объекты не изменяются
+        
+        Атрибуты:
+        users (List[UserSchema]): Пользователи, загруженные из БД
+        """
+        seen = self.lookup(user.id for user in users)
+        online_since = datetime.datetime.now() - datetime.timedelta(seconds=PRESENCE_TTL_SECONDS)
+        result = []
+        for user in users:
+            last_seen = seen.get(user.id, user.last_seen)
+            result.append(user.model_copy(update={
+                'last_seen': last_seen,
+                'online': last_seen is not None and last_seen >= online_since,
+            }))
+        return result
+    
+    async def flush(self) -> int:
+        """
+        Сохраняет накопленное время последней активности в БД одним пакетным запросом и удаляет из памяти
+        устаревшие записи
+        
+        Возвращается:
+        - Количество обновленных пользователей
+        """
+        dirty, self.dirty = self.dirty, set()
+        params = [{'id': user_id, 'last_seen': datetime.datetime.fromtimestamp(self.last_seen[user_id])}
+                  for user_id in dirty]
+        if params:
+            try:
+                async with async_session() as session:
+                    await session.execute(update(User), params)
+                    await session.commit()
+            except Exception:
+                self.dirty |= dirty
+                raise
+        
+        expired = int(time.time()) - PRESENCE_TTL_SECONDS
+        for user_id in [user_id for user_id, seen in self.last_seen.items() if seen < expired]:
+            if user_id not in self.dirty:
+                del self.last_seen[user_id]
+        return len(params)
+
+
+presence = PresenceRegistry()
+
+
+async def run_presence_flush():
+    """
+    Фоновая задача, периодически сохраняющая время последней активности пользователей в БД
+    """
+    try:
+        while True:
+            await asyncio.sleep(PRESENCE_FLUSH_INTERVAL_SECONDS)
+            try:
+                await presence.flush()
+            except Exception:
+                logger.exception('Failed to flush presence')
+    finally:
+        await presence.flush()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError, DataError, InterfaceError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import READ_MARKERS_FLUSH_INTERVAL_SECONDS
+from src.database import async_session
+from .models import ReadMarker
+
+FLUSH_BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+class ReadMarkerBuffer:
+    """
+    Буфер отметок о прочтении. Частые продвижения отметки одной переписки схлопываются в памяти до максимального ID
+    и периодически сохраняются в БД одним пакетным upsert
+    
+    Атрибуты:
+    pending (Dict[Tuple[int, int], int]): (ID читателя, ID собеседника) - ID последнего прочитанного сообщения
+    """
+    
+    def __init__(self):
+        self.pending: Dict[Tuple[int, int], int] = {}
+    
+    def advance(self, user_id: int, peer_id: int, message_id: int):
+        """
+        Продвигает отметку о прочтении. Отметка никогда не сдвигается назад
+        
+        Атрибуты:
+        user_id (int): ID читателя
+        peer_id (int): ID собеседника
+        message_id (int): ID последнего прочитанного сообщения
+        """
+        key = (user_id, peer_id)
+        if message_id > self.pending.get(key, 0):
+            self.pending[key] = message_id
+    
+    async def get_markers(self, user_id: int, session: AsyncSession) -> Dict[int, int]:
+        """
+        Получение отметок о прочтении пользователя с учетом еще не сохраненных в БД
+        
+        Атрибуты:
+        user_id (int): ID читателя
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к базе данных
+        
+        Возвращается:
+        - Словарь ID собеседника - ID последнего прочитанного сообщения
+        """
+        markers = await session.execute(select(ReadMarker.peer_id, ReadMarker.last_read_message_id)
+                                        .where(ReadMarker.user_id == user_id))
+        markers = dict(markers.all())
+        for (reader_id, peer_id), message_id in self.pending.items():
+            if reader_id == user_id and message_id > markers.get(peer_id, 0):
+                markers[peer_id] = message_id
+        return markers
+    
+    async def save(self, rows: List[Dict]) -> int:
+        """
+        Сохраняет отметки в БД одним запросом INSERT ... ON CONFLICT DO UPDATE. Если запрос отклонен из-за самих данных
+        (нарушено ограничение целостности или значение не помещается в столбец), пачка делится пополам, пока ошибка не
+        будет сведена к отдельной отметке, которая отбрасывается. Ошибки соединения с БД пробрасываются
+        
+        Атрибуты:
+        rows (List[Dict]): Отметки о прочтении
+        
+        Возвращается:
+        - Количество сохраненных отметок
+        """
+        stmt = insert(ReadMarker).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReadMarker.user_id, ReadMarker.peer_id],
+            set_={'last_read_message_id': func.greatest(ReadMarker.last_read_message_id,
+                                                        stmt.excluded.last_read_message_id)}
+        )
+        try:
+            async with async_session() as session:
+                await session.execute(stmt)
+                await session.commit()
+            return len(rows)
+        except (IntegrityError, DataError, InterfaceError) as exc:
+            if exc.connection_invalidated:
+                raise
+            if len(rows) == 1:
+                logger.warning('Dropped read marker %s: %s', rows[0], exc.orig)
+                return 0
+        
+        middle = len(rows) // 2
+        return await self.save(rows[:middle]) + await self.save(rows[middle:])
+    
+    async def flush(self) -> int:
+        """
+        Сохраняет накопленные отметки в БД пачками по FLUSH_BATCH_SIZE. При недоступности БД несохраненные отметки
+        возвращаются в буфер
+        
+        Возвращается:
+        - Количество сохраненных отметок
+        """
+        pending, self.pending = self.pending, {}
+        rows = [{'user_id': user_id, 'peer_id': peer_id, 'last_read_message_id': message_id}
+                for (user_id, peer_id), message_id in pending.items()]
+        saved = 0
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            try:
+                saved += await self.save(rows[start:start + FLUSH_BATCH_SIZE])
+            except Exception:
+                for row in rows[start:]:
+                    self.advance(row['user_id'], row['peer_id'], row['last_read_message_id'])
+                raise
+        return saved
+
+
+read_markers = ReadMarkerBuffer()
+
+
+async def run_read_markers_flush():
+    """
+    Фоновая задача, периодически сохраняющая отметки о прочтении в БД
+    """
+    try:
+        while True:
+            await asyncio.sleep(READ_MARKERS_FLUSH_INTERVAL_SECONDS)
+            try:
+                await read_markers.flush()
+            except Exception:
+                logger.exception('Failed to flush read markers')
+    finally:
+        await read_markers.flush()
@@ -1,46 +1,188 @@
-from typing import List
-from fastapi import Depends, APIRouter
-from sqlalchemy import select, func
+import hashlib
+import json
+import zlib
+from typing import AsyncIterator, List
+from fastapi import Depends, APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select, func, or_, values, column, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.models import User
 from src.auth.schemas import UserSchema
 from src.messenger.models import Message
 from src.auth.utils import get_current_user
-from src.database import get_async_session
-from .schemas import MessagePostSchema, MessageOutSchema
+from src.database import get_async_session, get_shard_session, iterate_shard_sessions, shard_sessions, next_message_id, \
+    SHARDED
+from .cache import search_cache
+from .presence import presence
+from .read_markers import read_markers
+from .schemas import MessagePostSchema, MessageOutSchema, ReadMarkerSchema, UnreadCountSchema
 
 router = APIRouter(
     prefix="",
     tags=["Messenger"]
 )
 
+EXPORT_BATCH_SIZE = 1000
+
+users_adapter = TypeAdapter(List[UserSchema])
+
 
 @router.get('/users/search/', response_model=List[UserSchema])
 async def get_user_by_username(username: str,
+                               request: Request,
                                session: AsyncSession = Depends(get_async_session),
                                current_user: User = Depends(get_current_user)
-                               ) -> List[User]:
+                               ) -> Response:
     """
-    URL для поиска пользователей по никнейму
+    URL для поиска пользователей по никнейму. Пользователи дополняются статусом "в сети" и временем последней активности.
+    Результаты поиска кратковременно кэшируются. Ответ снабжается заголовком ETag, и если переданный клиентом
+    If-None-Match совпадает с ним, возвращается 304 Not Modified без тела
     """
-    res = await session.execute(select(User)
-                                .filter(func.lower(User.username).like(func.lower(f'%{username}%'))
-                                        )
-                                )
-    return res.scalars().all()
+    query = search_cache.normalize(username)
+    users = search_cache.get(query)
+    if users is None:
+        res = await session.execute(select(User)
+                                    .filter(func.lower(User.username).like(func.lower(f'%{query}%'))
+                                            )
+                                    )
+        users = [UserSchema.model_validate(user) for user in res.scalars().all()]
+        search_cache.set(query, users)
+    
+    body = users_adapter.dump_json(presence.annotate(users))
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+@router.post('/users/heartbeat/', status_code=status.HTTP_204_NO_CONTENT)
+async def heartbeat(current_user: User = Depends(get_current_user)) -> Response:
+    """
+    URL для сигнала активности. Клиент вызывает его периодически, пока пользователь находится в сети
+    """
+    presence.heartbeat(current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.post('/messages/send/', response_model=MessageOutSchema)
 async def send_message(message: MessagePostSchema,
                        session: AsyncSession = Depends(get_async_session),
                        current_user: User = Depends(get_current_user)) -> Message:
     """
-    URL для отправки сообщения
+    URL для отправки сообщения. Сообщение сохраняется в шард, отведенный переписке отправителя и получателя
     """
+    if SHARDED:
+        # внешний ключ на таблицу User в шардах отсутствует, поэтому получатель проверяется в основной БД
+        recipient = await session.execute(select(User.id).where(User.id == message.recipient_id))
+        if not recipient.scalars().first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Recipient not found",
+            )
+    
     data = {
+        'id': await next_message_id(session),
         'sender_id': current_user.id,
         **message.dict()
     }
     new_message: Message = Message(**data)
-    session.add(new_message)
-    await session.commit()
+    async with get_shard_session(current_user.id, message.recipient_id, session) as shard_session:
+        shard_session.add(new_message)
+        await shard_session.commit()
     return new_message
+
+
+async def export_messages(user_id: int, compress: bool) -> AsyncIterator[bytes]:
+    """
+    Асинхронный генератор истории сообщений пользователя в формате NDJSON.
+    Сообщения читаются серверным курсором пачками по EXPORT_BATCH_SIZE строк, поэтому расход памяти не зависит от
+    размера истории. Шарды выгружаются по очереди, внутри шарда сообщения упорядочены по ID
+
+    Атрибуты:
+    user_id (int): ID пользователя, чья переписка выгружается
+    compress (bool): Сжимать ли поток в gzip на лету
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    query = (select(Message.id, Message.sender_id, Message.recipient_id, Message.content)
+             .where(or_(Message.sender_id == user_id, Message.recipient_id == user_id))
+             .order_by(Message.id)
+             .execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    for shard_session in shard_sessions:
+        async with shard_session() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                chunk = ''.join(json.dumps(dict(row._mapping), ensure_ascii=False) + '\n' for row in rows).encode()
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+@router.get('/messages/export/')
+async def export_history(compress: bool = False,
+                         current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    """
+    URL для выгрузки всей истории сообщений текущего пользователя в формате NDJSON (одно сообщение на строку)
+    """
+    filename = f'messages_{current_user.id}.ndjson{".gz" if compress else ""}'
+    return StreamingResponse(export_messages(current_user.id, compress),
+                             media_type='application/gzip' if compress else 'application/x-ndjson',
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@router.post('/messages/read/', status_code=status.HTTP_204_NO_CONTENT)
+async def mark_read(marker: ReadMarkerSchema,
+                    session: AsyncSession = Depends(get_async_session),
+                    current_user: User = Depends(get_current_user)) -> Response:
+    """
+    URL для отметки о прочтении. Все сообщения собеседника с ID не больше message_id считаются прочитанными.
+    Отметка не продвигается дальше последнего полученного от собеседника сообщения
+    """
+    peer = await session.execute(select(User.id).where(User.id == marker.peer_id))
+    if not peer.scalars().first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Peer not found",
+        )
+    
+    async with get_shard_session(current_user.id, marker.peer_id, session) as shard_session:
+        latest = await shard_session.scalar(select(func.max(Message.id))
+                                            .where(Message.recipient_id == current_user.id,
+                                                   Message.sender_id == marker.peer_id))
+    if latest:
+        read_markers.advance(current_user.id, marker.peer_id, min(marker.message_id, latest))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get('/messages/unread/', response_model=List[UnreadCountSchema])
+async def get_unread_counts(session: AsyncSession = Depends(get_async_session),
+                            current_user: User = Depends(get_current_user)) -> List[UnreadCountSchema]:
+    """
+    URL для получения количества непрочитанных сообщений от каждого собеседника. Отметки о прочтении хранятся в
+    основной БД, сообщения подсчитываются в каждом шарде
+    """
+    markers = await read_markers.get_markers(current_user.id, session)
+    query = (select(Message.sender_id, func.count())
+             .where(Message.recipient_id == current_user.id)
+             .group_by(Message.sender_id))
+    if markers:
+        marker_values = (values(column('peer_id', Integer), column('last_read_message_id', Integer),
+                                name='markers')
+                         .data(list(markers.items())))
+        query = (query.outerjoin(marker_values, marker_values.c.peer_id == Message.sender_id)
+                 .where(Message.id > func.coalesce(marker_values.c.last_read_message_id, 0)))
+    
+    # во время перебалансировки переписка может временно находиться в двух шардах, поэтому счетчики суммируются
+    counts = {}
+    async for message_session in iterate_shard_sessions(session):
+        res = await message_session.execute(query)
+        for peer_id, unread in res.all():
+            counts[peer_id] = counts.get(peer_id, 0) + unread
+    return [UnreadCountSchema(peer_id=peer_id, unread=unread) for peer_id, unread in counts.items()]
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, conint
+
+MAX_ID = 2 ** 31 - 1
 
 
 class MessagePostSchema(BaseModel):
@@ -23,3 +25,27 @@ class MessageOutSchema(MessagePostSchema):
     """
     id: int
     sender_id: int
+
+
+class ReadMarkerSchema(BaseModel):
+    """
+    Cхема отметки о прочтении
+
+    Атрибуты:
+    peer_id (int): ID собеседника
+    message_id (int): ID последнего прочитанного сообщения собеседника
+    """
+    peer_id: conint(gt=0, le=MAX_ID)
+    message_id: conint(gt=0, le=MAX_ID)
+
+
+class UnreadCountSchema(BaseModel):
+    """
+    Cхема количества непрочитанных сообщений от собеседника
+
+    Атрибуты:
+    peer_id (int): ID собеседника
+    unread (int): Количество непрочитанных сообщений
+    """
+    peer_id: int
+    unread: int
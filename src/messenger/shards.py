@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+from sqlalchemy import MetaData, Table, Column, Integer, Text, Index, select, delete, func, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.database import engine, shard_engines, shard_for, SHARDED
+
+# Таблица сообщений в шардах повторяет таблицу Message, но без внешних ключей на таблицу User, которая хранится только
+# в основной БД. ID сообщений выделяются последовательностью основной БД
+shard_metadata = MetaData()
+shard_message_table = Table(
+    'Message', shard_metadata,
+    Column('id', Integer, primary_key=True, autoincrement=False),
+    Column('sender_id', Integer, nullable=False),
+    Column('recipient_id', Integer, nullable=False),
+    Column('content', Text, nullable=False),
+    Index('ix_Message_recipient_id_sender_id_id', 'recipient_id', 'sender_id', 'id'),
+)
+
+
+async def init_shards():
+    """
+    Создает таблицу сообщений во всех шардах, где ее еще нет
+    """
+    for index, shard_engine in enumerate(shard_engines):
+        async with shard_engine.begin() as conn:
+            await conn.run_sync(shard_metadata.create_all)
+        print(f'Shard {index}: ready')
+
+
+async def move_conversation(source: AsyncEngine, target: AsyncEngine, user_id: int, peer_id: int,
+                            batch_size: int) -> int:
+    """
+    Переносит переписку двух пользователей из одной БД в другую пачками. Сообщения сначала записываются в целевую БД
+    и только потом удаляются из исходной, поэтому прерванный перенос можно безопасно запустить повторно
+
+    Атрибуты:
+    source (AsyncEngine): БД, из которой переносится переписка
+    target (AsyncEngine): БД, в которую переносится переписка
+    user_id (int): ID одного участника переписки
+    peer_id (int): ID другого участника переписки
+    batch_size (int): Количество сообщений в одной пачке
+
+    Возвращается:
+    - Количество перенесенных сообщений
+    """
+    table = shard_message_table
+    conversation = or_(and_(table.c.sender_id == user_id, table.c.recipient_id == peer_id),
+                       and_(table.c.sender_id == peer_id, table.c.recipient_id == user_id))
+    moved = 0
+    while True:
+        async with source.connect() as conn:
+            rows = await conn.execute(select(table).where(conversation).order_by(table.c.id).limit(batch_size))
+            rows = [dict(row._mapping) for row in rows.all()]
+        if not rows:
+            return moved
+
+        async with target.begin() as conn:
+            await conn.execute(insert(table).on_conflict_do_nothing(index_elements=[table.c.id]), rows)
+        async with source.begin() as conn:
+            await conn.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+        moved += len(rows)
+
+
+async def rebalance(batch_size: int):
+    """
+    Переносит переписки, хранящиеся не в своем шарде, в шард, назначенный им текущей конфигурацией.
+    Основная БД тоже просматривается, чтобы перенести сообщения, записанные до включения шардирования
+
+    Атрибуты:
+    batch_size (int): Количество сообщений, переносимых за одну транзакцию
+    """
+    if not SHARDED:
+        print('Sharding is not configured, nothing to rebalance')
+        return
+
+    sources = list(enumerate(shard_engines))
+    if all(shard_engine.url != engine.url for shard_engine in shard_engines):
+        sources.append(('main', engine))
+
+    table = shard_message_table
+    user_id = func.least(table.c.sender_id, table.c.recipient_id)
+    peer_id = func.greatest(table.c.sender_id, table.c.recipient_id)
+    for source_index, source in sources:
+        conversations = moved = 0
+        async with source.connect() as conn:
+            result = await conn.stream(select(user_id, peer_id)
+                                       .group_by(user_id, peer_id)
+                                       .execution_options(yield_per=batch_size))
+            async for first_id, second_id in result:
+                target_index = shard_for(first_id, second_id, len(shard_engines))
+                if target_index == source_index:
+                    continue
+                moved += await move_conversation(source, shard_engines[target_index], first_id, second_id,
+                                                 batch_size)
+                conversations += 1
+        print(f'Shard {source_index}: moved {conversations} conversations, {moved} messages')
+
+
+async def run(args: argparse.Namespace):
+    """
+    Выполняет выбранную команду и закрывает соединения с БД
+    """
+    try:
+        if args.command == 'init':
+            await init_shards()
+        else:
+            await rebalance(args.batch_size)
+    finally:
+        for shard_engine in {engine, *shard_engines}:
+            await shard_engine.dispose()
+
+
+def main():
+    """
+    Точка входа консольной команды управления шардами сообщений:
+
+    python -m src.messenger.shards init
+    python -m src.messenger.shards rebalance --batch-size 1000
+    """
+    parser = argparse.ArgumentParser(description='Message shards management')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('init', help='Create message tables in all shards')
+    rebalance_parser = subparsers.add_parser('rebalance', help='Move conversations to their configured shards')
+    rebalance_parser.add_argument('--batch-size', type=int, default=1000, help='Messages moved per transaction')
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import re
+import time
+import uuid
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from src.config import PROFILING_TOKEN, PROFILING_SAMPLE_RATE, PROFILES_DIR, PROFILES_MAX_FILES
+
+PROFILE_HEADER = b'x-profile'
+
+
+def rotate_profiles():
+    """
+    Удаляет самые старые файлы профилей, оставляя не больше PROFILES_MAX_FILES
+    """
+    profiles = sorted((entry for entry in os.scandir(PROFILES_DIR) if entry.name.endswith('.pstats')),
+                      key=lambda entry: entry.stat().st_mtime)
+    for entry in profiles[:max(len(profiles) - PROFILES_MAX_FILES, 0)]:
+        os.remove(entry.path)
+
+
+def save_profile(profiler: cProfile.Profile, profile_id: str):
+    """
+    Сохраняет профиль на диск и удаляет устаревшие. Выполняется в отдельном потоке, чтобы не блокировать цикл событий
+
+    Атрибуты:
+    profiler (cProfile.Profile): Остановленный профилировщик
+    profile_id (str): Имя файла профиля без расширения
+    """
+    profiler.dump_stats(os.path.join(PROFILES_DIR, f'{profile_id}.pstats'))
+    rotate_profiles()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware профилирования запросов по требованию. Запрос профилируется cProfile, если в заголовке X-Profile
+    передан секрет PROFILING_TOKEN и запрос попал в выборку PROFILING_SAMPLE_RATE. Результат сохраняется в формате
+    pstats в папку PROFILES_DIR, имя файла возвращается в заголовке ответа X-Profile-Id.
+    Запросы без заголовка передаются приложению без дополнительных действий.
+
+    Профилировщик работает в потоке цикла событий, поэтому одновременно профилируется только один запрос, а в профиль
+    попадают и корутины других запросов, выполнявшиеся в это время. Ожидание ответа БД видно как время внутри
+    цикла событий.
+
+    Просмотр профиля: python -m pstats <файл>, для флеймграфа подходят snakeviz или flameprof
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = '{}_{}_{}_{}'.format(time.strftime('%Y%m%d-%H%M%S'), uuid.uuid4().hex[:8], scope['method'],
+                                          re.sub(r'[^\w-]+', '_', scope['path']).strip('_'))
+
+        async def send_with_profile_id(message: Message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (b'x-profile-id', profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self.active = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.active = False
+            await asyncio.to_thread(save_profile, profiler, profile_id)
+
+    def should_profile(self, scope: Scope) -> bool:
+        """
+        Проверяет, нужно ли профилировать запрос
+
+        Атрибуты:
+        scope (Scope): Параметры ASGI-запроса
+        """
+        for name, value in scope['headers']:
+            if name == PROFILE_HEADER:
+                return (not self.active
+                        and hmac.compare_digest(value, PROFILING_TOKEN.encode())
+                        and random.random() < PROFILING_SAMPLE_RATE)
+        return False